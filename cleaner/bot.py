@@ -8,11 +8,12 @@ import os
 
 from aiohttp import web
 from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.memory import SimpleEventIsolation
 from dotenv import load_dotenv
-from prometheus_client import generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from .handlers import router
-from .metrics import registry
+from .metrics import flush_metrics, registry
 
 # Load environment
 load_dotenv()
@@ -32,7 +33,11 @@ logger = logging.getLogger(__name__)
 
 async def metrics_handler(request):
     """Handler for /metrics endpoint."""
-    return web.Response(text=generate_latest(registry).decode('utf-8'), content_type='text/plain', charset='utf-8')
+    # Batched counters are flushed on the loop thread, so each scrape sees exact totals
+    flush_metrics()
+    # Serialize in a worker thread so scrapes don't stall polling
+    output = await asyncio.get_running_loop().run_in_executor(None, generate_latest, registry)
+    return web.Response(body=output, headers={'Content-Type': CONTENT_TYPE_LATEST})
 
 
 async def web_server():
@@ -51,7 +56,9 @@ async def web_server():
 async def main() -> None:
     """Main bot function."""
     bot = Bot(token=TOKEN)
-    dp = Dispatcher()
+    # Polling handles each update in its own task; isolation keeps a chat's updates in order
+    # and loads the FSM state only once the previous update has finished
+    dp = Dispatcher(events_isolation=SimpleEventIsolation())
     dp.include_router(router)
 
     # Start both bot and metrics server
@@ -5,28 +5,121 @@ Cookie cleaning and analysis module.
 import json
 import logging
 import os
+import re
 from collections import Counter, defaultdict
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from functools import lru_cache
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, FrozenSet, Iterator, List, Mapping, Optional, Set, TextIO, Tuple
 
-from .config import SITES, SCORING_RULES, CATEGORIES
+from .config import AUTH_LC, KEY_TO_SERVICE, LEVELS_DESC, SCORING_RULES, SERVICE_RE, SITE_TO_CATEGORY, SITES
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Buffer size for cookie file I/O; dumps can be several MB
+IO_BUFFER_SIZE = 1 << 20
+
 # Category scores for enhanced scoring system
 CATEGORY_SCORES = {
-    "social": ["facebook", "instagram", "x", "tiktok", "discord"],
-    "entertainment": ["netflix", "spotify", "twitch", "youtube"],
-    "professional": ["linkedin", "github"],
-    "shopping": ["amazon", "ebay", "paypal"],
-    "search": ["google"]
+    "social": frozenset(["facebook", "instagram", "x", "tiktok", "discord"]),
+    "entertainment": frozenset(["netflix", "spotify", "twitch", "youtube"]),
+    "professional": frozenset(["linkedin", "github"]),
+    "shopping": frozenset(["amazon", "ebay", "paypal"]),
+    "search": frozenset(["google"])
+}
+
+# Display order for services in reports; unknown services sort last
+_SERVICE_ORDER_RANK = {
+    name: rank
+    for rank, name in enumerate([
+        "search", "gmail", "youtube", "other", "shopping", "marketplace", "twitter", "facebook",
+        "tiktok", "reddit", "linkedin", "github", "discord", "twitch", "netflix", "spotify",
+    ])
+}
+
+# Cookie name fragments of common analytics/advertising trackers
+TRACKING_PATTERNS = [
+    "_ga", "_gid", "_gat", "__utma", "__utmb", "__utmc", "__utmz",  # Google Analytics
+    "_fbp", "_fbc", "fr",  # Facebook
+    "_tt_enable_cookie", "_ttp",  # TikTok
+    "mbox", "AMCV_", "s_cc", "s_sq", "s_vi",  # Adobe Analytics
+    "utag_main", "_utma", "_utmb", "_utmc", "_utmz",  # Tealium
+    "mp_", "__mp",  # Mixpanel
+    "amplitude_id",  # Amplitude
+    "ajs_user_id", "ajs_anonymous_id",  # Segment
+    "_hjid", "_hjClosedSurveyInvites",  # Hotjar
+    "intercom-id-", "intercom-session-",  # Intercom
+    "zendesk_",  # Zendesk
+    "drift_",  # Drift
+    "hsCtaTracking", "_hstc", "_hssc",  # HubSpot
+]
+
+# All tracking patterns folded into one alternation so a name is scanned once
+_TRACKING_RE = re.compile("|".join(re.escape(pattern.lower()) for pattern in TRACKING_PATTERNS))
+
+
+# Brand names matched as a prefix of the registrable label, so asset and API domains
+# such as googleapis, discordapp or steamstatic count towards their brand
+_BRAND_PREFIXES = {
+    "linkedin": "linkedin",
+    "github": "github",
+    "discord": "discord",
+    "twitch": "twitch",
+    "netflix": "netflix",
+    "spotify": "spotify",
+    "reddit": "reddit",
+    "tiktok": "tiktok",
+    "paypal": "paypal",
+    "twitter": "x",
+    "google": "google",
+    "youtube": "google",
+    "gmail": "google",
+    "amazon": "amazon",
+    "ebay": "ebay",
+    "facebook": "facebook",
+    "instagram": "instagram",
+    "roblox": "roblox",
+    "steam": "steam",
+    "epicgames": "epicgames",
+    "microsoft": "microsoft",
+    "outlook": "microsoft",
+    "hotmail": "microsoft",
+    "office365": "microsoft",
+    "apple": "apple",
+    "icloud": "apple",
+    "genshin": "genshin",
+    "mihoyo": "genshin",
+    "hoyolab": "genshin",
+    "hoyoverse": "genshin",
+    "minecraft": "minecraft",
+    "mojang": "minecraft",
 }
+# Longest first, so the most specific name wins
+_BRAND_PREFIX_RE = re.compile("|".join(re.escape(name) for name in sorted(_BRAND_PREFIXES, key=len, reverse=True)))
+
+# Aliases matched only as the whole registrable label; as prefixes they would catch
+# unrelated sites (xvideos, fbi, livejournal, epicurious)
+_SLD_TO_BRAND = {
+    "x": "x",
+    "fb": "facebook",
+    "fbcdn": "facebook",
+    "fbsbx": "facebook",
+    "cdninstagram": "instagram",
+    "live": "microsoft",
+    "epic": "epicgames",
+}
+
+# Generic second-level labels under country TLDs, as in amazon.co.uk or google.com.br
+_SECOND_LEVEL_SUFFIXES = frozenset(["ac", "co", "com", "edu", "gov", "ne", "net", "or", "org"])
+
+
+# Memo for get_main_domain; reset when full so a long-running bot stays bounded
+_DOMAIN_MEMO: Dict[str, str] = {}
+_DOMAIN_MEMO_MAX = 4096
 
 
-@lru_cache(maxsize=512)
 def get_main_domain(domain: str) -> str:
     """
     Get the main domain (second level domain), with special mappings for known sites.
@@ -37,41 +130,41 @@ def get_main_domain(domain: str) -> str:
     Returns:
         Main domain.
     """
-    domain = domain.lower().lstrip(".")
+    main_domain = _DOMAIN_MEMO.get(domain)
+    if main_domain is None:
+        if len(_DOMAIN_MEMO) >= _DOMAIN_MEMO_MAX:
+            _DOMAIN_MEMO.clear()
+        main_domain = _DOMAIN_MEMO[domain] = _compute_main_domain(domain)
+    return main_domain
 
-    # Domain mappings: more specific patterns first
-    domain_mappings = {
-        "linkedin": ["linkedin"],
-        "github": ["github"],
-        "discord": ["discord"],
-        "twitch": ["twitch"],
-        "netflix": ["netflix"],
-        "spotify": ["spotify"],
-        "reddit": ["reddit"],
-        "tiktok": ["tiktok"],
-        "paypal": ["paypal"],
-        "x": ["x.com", "twitter"],
-        "google": ["google", "youtube", "gmail"],
-        "amazon": ["amazon"],
-        "ebay": ["ebay"],
-        "facebook": ["facebook", "fb"],
-        "instagram": ["instagram"],
-        "roblox": ["roblox"],
-        "steam": ["steam", "steampowered"],
-        "epicgames": ["epicgames", "epic"],
-        "microsoft": ["microsoft", "live", "outlook"],
-        "apple": ["apple", "icloud"],
-        "genshin": ["genshin", "mihoyo"],
-        "minecraft": ["minecraft", "mojang"],
-    }
 
-    # Check for special mappings
-    for main_domain, patterns in domain_mappings.items():
-        if any(pattern in domain for pattern in patterns):
-            return main_domain
+def _compute_main_domain(domain: str) -> str:
+    """
+    Resolve a domain to its known brand or second-level domain.
 
-    # Default: extract second-level domain
+    Args:
+        domain: The domain string.
+
+    Returns:
+        Main domain.
+    """
+    domain = domain.lower().lstrip(".")
     parts = domain.split(".")
+
+    # Only the registrable label names the site; subdomains like live.nba.com don't count
+    index = len(parts) - 2
+    while index > 0 and parts[index] in _SECOND_LEVEL_SUFFIXES:
+        index -= 1
+    if index >= 0:
+        label = parts[index]
+        brand = _SLD_TO_BRAND.get(label)
+        if brand:
+            return brand
+        match = _BRAND_PREFIX_RE.match(label)
+        if match:
+            return _BRAND_PREFIXES[match.group()]
+
+    # Default: extract second-level domain
     if len(parts) >= 2:
         return ".".join(parts[-2:])
     return domain
@@ -88,13 +181,14 @@ def detect_service(main_domain: str, domain: str) -> str:
     Returns:
         Service name.
     """
-    domain = domain.lower()
-    if main_domain in SITES:
-        for service, keys in SITES[main_domain]["services"].items():
-            if any(k in domain for k in keys):
-                return service
-        return "other"
-    return ""
+    if main_domain not in SERVICE_RE:
+        return ""
+
+    service_re = SERVICE_RE[main_domain]
+    match = service_re.search(domain.lower()) if service_re else None
+    if match:
+        return KEY_TO_SERVICE[main_domain][match.group(0)]
+    return "other"
 
 
 def detect_auth(main_domain: str, cookie_name: str) -> Optional[str]:
@@ -108,144 +202,191 @@ def detect_auth(main_domain: str, cookie_name: str) -> Optional[str]:
     Returns:
         Auth name if matched.
     """
-    if main_domain in SITES:
-        for auth in SITES[main_domain]["auth"]:
-            if auth.lower() in cookie_name.lower():
-                return auth
+    auths = AUTH_LC.get(main_domain)
+    if not auths:
+        return None
+
+    cookie_name = cookie_name.lower()
+    for auth_lc, auth in auths:
+        if auth_lc in cookie_name:
+            return auth
     return None
 
 
-def parse_cookies(file_path: str) -> Tuple[Counter, defaultdict, defaultdict]:
+def _read_cookie_text(file_path: str) -> str:
     """
-    Parse cookies from a file and return counters.
+    Read a cookies file in one call and decode it.
 
     Args:
         file_path: Path to the cookies file.
 
     Returns:
-        Tuple of site_counter, service_counter, auth_detected.
+        File contents as text.
     """
-    site_counter = Counter()
-    service_counter = defaultdict(Counter)
-    auth_detected = defaultdict(set)
-    seen_cookies = set()
-
     try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-
-                parts = line.split("\t")
-                if len(parts) < 7:
-                    logger.warning(f"Skipping invalid line {line_num}: {line}")
-                    continue
+        with open(file_path, "rb", buffering=0) as f:
+            return f.read().decode("utf-8", "ignore")
+    except FileNotFoundError:
+        logger.error(f"File not found: {file_path}")
+        raise
 
-                domain = parts[0]
-                cookie_name = parts[5]
 
-                unique_key = f"{domain}|{cookie_name}"
-                if unique_key in seen_cookies:
-                    continue
-                seen_cookies.add(unique_key)
+def _iter_cookie_rows(text: str) -> Iterator[Tuple[List[str], str]]:
+    """
+    Yield tokenized rows of a Netscape cookies file, skipping blank and invalid lines.
 
-                main_domain = get_main_domain(domain)
-                service = detect_service(main_domain, domain)
-                site_counter[main_domain] += 1
-                service_counter[main_domain][service] += 1
+    Args:
+        text: Contents of the cookies file.
 
-                auth = detect_auth(main_domain, cookie_name)
-                if auth:
-                    auth_detected[main_domain].add(auth)
+    Yields:
+        Tuple of the row fields and the raw line.
+    """
+    # Split on "\n" only; splitlines() would also break on characters like \x0b or \u2028
+    # that may appear inside cookie values
+    for line_num, line in enumerate(text.split("\n"), 1):
+        if line.endswith("\r"):
+            line = line[:-1]
+        if not line.strip():
+            continue
 
-    except FileNotFoundError:
-        logger.error(f"File not found: {file_path}")
-        raise
-    except Exception as e:
-        logger.error(f"Error parsing cookies file: {e}")
-        raise
+        # The value is the last field; don't split inside it
+        parts = line.split("\t", 6)
+        if len(parts) < 7:
+            logger.warning(f"Skipping invalid line {line_num}: {line}")
+            continue
 
-    return site_counter, service_counter, auth_detected
+        yield parts, line
 
 
-def calculate_oldest_cookie_age(lines: List[str]) -> str:
+def _scan_cookies(text: str, cleaned_file: Optional[TextIO] = None) -> Dict:
     """
-    Calculate the age of the oldest cookie from cookie lines.
+    Walk a cookies file once and collect everything the analysis needs.
 
     Args:
-        lines: List of cookie lines.
+        text: Contents of the cookies file.
+        cleaned_file: Optional handle that receives auth cookie lines as they are found.
 
     Returns:
-        Age string like "30 days" or "Unknown".
+        Dict with counters and aggregate metrics.
     """
+    auth_detected = defaultdict(set)
+    classified: List[Tuple[str, str]] = []
+    seen_cookies: Set[Tuple[str, str]] = set()
+    domain_info: Dict[str, Tuple[str, str]] = {}
+    cleaned_count = 0
     oldest_timestamp = None
-    current_time = datetime.now(timezone.utc)
+    tracking_count = 0
+
+    try:
+        for parts, line in _iter_cookie_rows(text):
+            domain = parts[0]
+            cookie_name = parts[5]
+
+            unique_key = (domain, cookie_name)
+            if unique_key in seen_cookies:
+                continue
+            seen_cookies.add(unique_key)
+
+            # Classify each distinct domain once; dumps repeat domains heavily
+            info = domain_info.get(domain)
+            if info is None:
+                main_domain = get_main_domain(domain)
+                info = domain_info[domain] = (main_domain, detect_service(main_domain, domain))
+            classified.append(info)
+            main_domain = info[0]
+
+            auth = detect_auth(main_domain, cookie_name)
+            if auth:
+                auth_detected[main_domain].add(auth)
+                cleaned_count += 1
+                if cleaned_file is not None:
+                    cleaned_file.write(line + "\n")
 
-    for line in lines:
-        parts = line.strip().split("\t")
-        if len(parts) >= 5:
             try:
                 # Parse expires timestamp (parts[4])
                 expires_ts = int(parts[4])
-                if expires_ts > 0:  # 0 means session cookie
-                    expires_time = datetime.fromtimestamp(expires_ts, timezone.utc)
-                    if oldest_timestamp is None or expires_time < oldest_timestamp:
-                        oldest_timestamp = expires_time
-            except (ValueError, IndexError):
-                continue
+            except ValueError:
+                expires_ts = 0
+            # 0 means session cookie
+            if expires_ts > 0 and (oldest_timestamp is None or expires_ts < oldest_timestamp):
+                oldest_timestamp = expires_ts
 
-    if oldest_timestamp:
-        age_days = (current_time - oldest_timestamp).days
-        if age_days < 1:
-            return "Less than 1 day"
-        elif age_days < 30:
-            return f"{age_days} days"
-        elif age_days < 365:
-            months = age_days // 30
-            return f"{months} months"
-        else:
-            years = age_days // 365
-            return f"{years} years"
+            if is_tracking_cookie(cookie_name):
+                tracking_count += 1
+
+    except Exception as e:
+        logger.error(f"Error parsing cookies file: {e}")
+        raise
+
+    # Count in bulk; first-seen order is kept so most_common() ties stay stable
+    site_counter = Counter()
+    service_counter = defaultdict(Counter)
+    for (main_domain, service), count in Counter(classified).items():
+        site_counter[main_domain] += count
+        service_counter[main_domain][service] = count
+
+    return {
+        "site_counter": site_counter,
+        "service_counter": service_counter,
+        "auth_detected": auth_detected,
+        "cleaned_count": cleaned_count,
+        "total_unique_cookies": len(seen_cookies),
+        "oldest_timestamp": oldest_timestamp,
+        "tracking_count": tracking_count,
+    }
 
-    return "Unknown"
+
+def parse_cookies(file_path: str) -> Tuple[Counter, defaultdict, defaultdict]:
+    """
+    Parse cookies from a file and return counters.
+
+    Args:
+        file_path: Path to the cookies file.
+
+    Returns:
+        Tuple of site_counter, service_counter, auth_detected.
+    """
+    scan = _scan_cookies(_read_cookie_text(file_path))
+    return scan["site_counter"], scan["service_counter"], scan["auth_detected"]
 
 
-def count_tracking_cookies(lines: List[str]) -> int:
+def format_cookie_age(oldest_timestamp: Optional[int]) -> str:
     """
-    Count tracking cookies (Google Analytics, Facebook Pixel, etc.).
+    Format the age of the oldest cookie.
 
     Args:
-        lines: List of cookie lines.
+        oldest_timestamp: Oldest expiry as a Unix timestamp, or None.
 
     Returns:
-        Number of tracking cookies detected.
-    """
-    tracking_patterns = [
-        "_ga", "_gid", "_gat", "__utma", "__utmb", "__utmc", "__utmz",  # Google Analytics
-        "_fbp", "_fbc", "fr",  # Facebook
-        "_tt_enable_cookie", "_ttp",  # TikTok
-        "mbox", "AMCV_", "s_cc", "s_sq", "s_vi",  # Adobe Analytics
-        "utag_main", "_utma", "_utmb", "_utmc", "_utmz",  # Tealium
-        "mp_", "__mp",  # Mixpanel
-        "amplitude_id",  # Amplitude
-        "ajs_user_id", "ajs_anonymous_id",  # Segment
-        "_hjid", "_hjClosedSurveyInvites",  # Hotjar
-        "intercom-id-", "intercom-session-",  # Intercom
-        "zendesk_",  # Zendesk
-        "drift_",  # Drift
-        "hsCtaTracking", "_hstc", "_hssc",  # HubSpot
-    ]
+        Age string like "30 days" or "Unknown".
+    """
+    if oldest_timestamp is None:
+        return "Unknown"
+
+    age_days = (int(datetime.now(timezone.utc).timestamp()) - oldest_timestamp) // 86400
+    if age_days < 1:
+        return "Less than 1 day"
+    elif age_days < 30:
+        return f"{age_days} days"
+    elif age_days < 365:
+        months = age_days // 30
+        return f"{months} months"
+    else:
+        years = age_days // 365
+        return f"{years} years"
 
-    tracking_count = 0
-    for line in lines:
-        parts = line.strip().split("\t")
-        if len(parts) >= 6:
-            cookie_name = parts[5].lower()
-            if any(pattern.lower() in cookie_name for pattern in tracking_patterns):
-                tracking_count += 1
 
-    return tracking_count
+def is_tracking_cookie(cookie_name: str) -> bool:
+    """
+    Check whether a cookie is a known tracking cookie (Google Analytics, Facebook Pixel, etc.).
+
+    Args:
+        cookie_name: The cookie name.
+
+    Returns:
+        True if the name matches a tracking pattern.
+    """
+    return _TRACKING_RE.search(cookie_name.lower()) is not None
 
 
 def calculate_privacy_score(cleaned_count: int, total_count: int) -> float:
@@ -279,19 +420,31 @@ def get_sites_by_category(site_counter: Counter) -> Dict[str, List[str]]:
     Returns:
         Dict of category to list of sites.
     """
+    # Only site names matter; a tuple keeps their order within each category.
+    # The cached grouping is immutable, callers get their own lists.
+    grouped = _group_sites_by_category(tuple(site_counter))
+    return {category: list(sites) for category, sites in grouped}
+
+
+@lru_cache(maxsize=256)
+def _group_sites_by_category(sites: Tuple[str, ...]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """
+    Group site names by categories.
+
+    Args:
+        sites: Site names in report order.
+
+    Returns:
+        Tuple of (category, sites) pairs in first-seen order.
+    """
     category_sites = defaultdict(list)
-    for site in site_counter:
-        for category, sites in CATEGORIES.items():
-            if site in sites:
-                category_sites[category].append(site)
-                break
-        else:
-            category_sites["other"].append(site)
-    return dict(category_sites)
+    for site in sites:
+        category_sites[SITE_TO_CATEGORY.get(site, "other")].append(site)
+    return tuple((category, tuple(names)) for category, names in category_sites.items())
 
 
 
-def calculate_category_bonuses(site_counter: Counter) -> List[str]:
+def calculate_category_bonuses(site_counter: Counter) -> List[Tuple[str, int]]:
     """
     Calculate bonuses for category combinations.
 
@@ -299,88 +452,130 @@ def calculate_category_bonuses(site_counter: Counter) -> List[str]:
         site_counter: Counter of sites.
 
     Returns:
-        List of bonus descriptions.
+        List of (bonus name, points) tuples.
     """
     bonuses = []
 
     # Social butterfly: 3+ social networks
-    social_sites = set(CATEGORY_SCORES["social"]) & set(site_counter.keys())
+    social_sites = CATEGORY_SCORES["social"].intersection(site_counter)
     if len(social_sites) >= 3:
-        bonuses.append("Social butterfly (+2)")
+        bonuses.append(("Social butterfly", 2))
 
     # Tech professional: LinkedIn + GitHub
     if "linkedin" in site_counter and "github" in site_counter:
-        bonuses.append("Tech professional (+3)")
+        bonuses.append(("Tech professional", 3))
 
     # Entertainment addict: 2+ entertainment services
-    entertainment_sites = set(CATEGORY_SCORES["entertainment"]) & set(site_counter.keys())
+    entertainment_sites = CATEGORY_SCORES["entertainment"].intersection(site_counter)
     if len(entertainment_sites) >= 2:
-        bonuses.append("Entertainment addict (+1)")
+        bonuses.append(("Entertainment addict", 1))
 
     # Shopaholic: 2+ shopping sites
-    shopping_sites = set(CATEGORY_SCORES["shopping"]) & set(site_counter.keys())
+    shopping_sites = CATEGORY_SCORES["shopping"].intersection(site_counter)
     if len(shopping_sites) >= 2:
-        bonuses.append("Shopaholic (+2)")
+        bonuses.append(("Shopaholic", 2))
 
     return bonuses
 
 
-def calculate_score(site_counter: Counter, service_counter: defaultdict, auth_detected: defaultdict) -> Tuple[int, str, List[str]]:
+def calculate_score(site_counter: Mapping, service_counter: Mapping, auth_detected: Mapping) -> Tuple[int, str, List[str]]:
     """
     Calculate the profile score based on cookies.
 
     Args:
-        site_counter: Counter of sites.
-        service_counter: Counter of services per site.
+        site_counter: Counts (or any mapping) keyed by site.
+        service_counter: Services per site; only membership is checked.
         auth_detected: Detected auth cookies per site.
 
     Returns:
         Tuple of score, level, score_reasons.
     """
+    # Only membership matters, so frozen keys let repeat uploads hit the cache
+    service_pairs = frozenset(
+        (site, service) for site, services in service_counter.items() for service in services
+    )
+    score, level, score_reasons = _calculate_score_cached(
+        frozenset(site_counter), service_pairs, bool(auth_detected)
+    )
+    return score, level, list(score_reasons)
+
+
+@lru_cache(maxsize=1024)
+def _calculate_score_cached(
+    sites: FrozenSet[str], service_pairs: FrozenSet[Tuple[str, str]], has_auth: bool
+) -> Tuple[int, str, Tuple[str, ...]]:
+    """
+    Calculate the profile score from frozen inputs.
 
-    score = 0
-    score_reasons = []
+    Args:
+        sites: Detected site names.
+        service_pairs: Detected (site, service) pairs.
+        has_auth: Whether any auth cookies were detected.
 
-    def add_score(points: int, reason: str) -> None:
-        nonlocal score
-        score += points
-        score_reasons.append(f"+{points} {reason}")
+    Returns:
+        Tuple of score, level, score_reasons.
+    """
+    # Matched rules as (points, reason); formatted once at the end
+    matched = []
 
     # Site scores
     for site, points in SCORING_RULES["sites"].items():
-        if site in site_counter:
-            add_score(points, f"{site.replace('.com', '').capitalize()} cookies")
+        if site in sites:
+            matched.append((points, f"{site.replace('.com', '').capitalize()} cookies"))
 
     # Category bonuses
-    category_bonuses = calculate_category_bonuses(site_counter)
-    for bonus in category_bonuses:
-        # Parse bonus format like "Social butterfly (+2)"
-        if "(" in bonus and ")" in bonus:
-            bonus_name = bonus.split(" (")[0]
-            bonus_points = int(bonus.split("(+")[1].rstrip(")"))
-            add_score(bonus_points, bonus_name)
+    for bonus_name, bonus_points in calculate_category_bonuses(sites):
+        matched.append((bonus_points, bonus_name))
 
     # Service bonuses
     for site, services in SCORING_RULES["services"].items():
-        if site in site_counter:
+        if site in sites:
             for service, points in services.items():
-                if service in service_counter.get(site, {}):
-                    add_score(points, f"{service.capitalize()} detected")
+                if (site, service) in service_pairs:
+                    matched.append((points, f"{service.capitalize()} detected"))
 
     # Auth bonus
-    if auth_detected:
-        add_score(SCORING_RULES["auth_bonus"], "AUTH cookies detected")
+    if has_auth:
+        matched.append((SCORING_RULES["auth_bonus"], "AUTH cookies detected"))
+
+    score = sum(points for points, _ in matched)
+    score_reasons = tuple(f"+{points} {reason}" for points, reason in matched)
 
     # Determine level
-    level = "LOW"
-    for lvl, config in SCORING_RULES["levels"].items():
-        if score >= config["min_score"]:
-            level = lvl
-            break
+    level = next((lvl for lvl, config in LEVELS_DESC if score >= config["min_score"]), "LOW")
 
     return score, level, score_reasons
 
-def clean_cookies(input_file_path: str, output_file_path: str) -> Dict:
+
+@dataclass
+class CleanStats:
+    """Stats of a cleaned cookies file, as used for reports."""
+
+    # Declared by hand since dataclass(slots=True) needs Python 3.10
+    __slots__ = (
+        "sites", "services", "services_joined", "auth_detected", "total_cleaned", "total_unique_cookies",
+        "unique_sites", "most_common_site", "oldest_timestamp", "tracking_intensity", "privacy_score",
+    )
+
+    sites: Dict[str, int]
+    services: Dict[str, List[str]]
+    services_joined: Dict[str, str]
+    auth_detected: Dict[str, Set[str]]
+    total_cleaned: int
+    total_unique_cookies: int
+    unique_sites: int
+    most_common_site: str
+    oldest_timestamp: Optional[int]
+    tracking_intensity: int
+    privacy_score: float
+
+    @property
+    def oldest_cookie_age(self) -> str:
+        """Age of the oldest cookie, computed on access so cached stats don't go stale."""
+        return format_cookie_age(self.oldest_timestamp)
+
+
+def clean_cookies(input_file_path: str, output_file_path: str) -> CleanStats:
     """
     Clean cookies file by keeping only auth cookies and return stats.
 
@@ -389,50 +584,47 @@ def clean_cookies(input_file_path: str, output_file_path: str) -> Dict:
         output_file_path: Path to output cleaned file.
 
     Returns:
-        Dict with stats.
+        CleanStats of the file.
     """
-    # Read all cookie lines first for analysis
-    all_lines = []
-    try:
-        with open(input_file_path, "r", encoding="utf-8", errors="ignore") as f:
-            all_lines = [line.strip() for line in f if line.strip()]
-    except FileNotFoundError:
-        logger.error(f"File not found: {file_path}")
-        raise
+    text = _read_cookie_text(input_file_path)
 
-    site_counter, service_counter, auth_detected = parse_cookies(input_file_path)
-    cleaned_lines = []
+    # Auth lines are streamed to the cleaned file while scanning
+    with open(output_file_path, "w", encoding="utf-8", buffering=IO_BUFFER_SIZE) as f:
+        scan = _scan_cookies(text, f)
 
-    # Re-parse to collect lines with auth
-    seen_cookies = set()
-    for line in all_lines:
-        parts = line.split("\t")
-        if len(parts) < 7:
-            continue
+    return _build_stats(scan)
 
-        domain = parts[0]
-        cookie_name = parts[5]
 
-        unique_key = f"{domain}|{cookie_name}"
-        if unique_key in seen_cookies:
-            continue
-        seen_cookies.add(unique_key)
+def clean_cookies_stream(data: bytes, cleaned_file: Optional[TextIO] = None) -> CleanStats:
+    """
+    Clean cookies from raw file contents and return stats.
 
-        main_domain = get_main_domain(domain)
-        auth = detect_auth(main_domain, cookie_name)
-        if auth:
-            cleaned_lines.append(line)
+    Args:
+        data: Raw bytes of the cookies file.
+        cleaned_file: Optional handle that receives the kept auth cookie lines.
 
-    # Write cleaned file
-    try:
-        with open(output_file_path, "w", encoding="utf-8") as f:
-            for line in cleaned_lines:
-                f.write(line + "\n")
-    except Exception as e:
-        logger.error(f"Error writing cleaned file: {e}")
-        raise
+    Returns:
+        CleanStats of the file.
+    """
+    return _build_stats(_scan_cookies(data.decode("utf-8", "ignore"), cleaned_file))
+
+
+def _build_stats(scan: Dict) -> CleanStats:
+    """
+    Turn scan results into the stats used for reports.
 
-    total_unique_cookies = len(seen_cookies)
+    Args:
+        scan: Result of _scan_cookies.
+
+    Returns:
+        CleanStats of the scan.
+    """
+    site_counter = scan["site_counter"]
+    service_counter = scan["service_counter"]
+    auth_detected = scan["auth_detected"]
+    cleaned_count = scan["cleaned_count"]
+
+    total_unique_cookies = scan["total_unique_cookies"]
     unique_sites = len(site_counter)
     most_common = site_counter.most_common(1)
     if most_common:
@@ -442,31 +634,34 @@ def clean_cookies(input_file_path: str, output_file_path: str) -> Dict:
         most_common_site = "None"
 
     # Calculate new metrics
-    oldest_cookie_age = calculate_oldest_cookie_age(all_lines)
-    tracking_intensity = count_tracking_cookies(all_lines)
-    privacy_score = calculate_privacy_score(len(cleaned_lines), total_unique_cookies)
+    tracking_intensity = scan["tracking_count"]
+    privacy_score = calculate_privacy_score(cleaned_count, total_unique_cookies)
 
     # For sites in config, combine detected and config services
     services_dict = {}
-    order = ["search", "gmail", "youtube", "other", "shopping", "marketplace", "twitter", "facebook", "tiktok", "reddit", "linkedin", "github", "discord", "twitch", "netflix", "spotify"]
+    services_joined = {}
     for site in site_counter:
         detected = [s for s in service_counter[site] if s]
         if site in SITES:
             config_services = list(SITES[site]["services"].keys())
             all_services = set(detected + config_services)
-            services_dict[site] = sorted(all_services, key=lambda x: order.index(x) if x in order else 99)
+            services_dict[site] = sorted(all_services, key=lambda x: _SERVICE_ORDER_RANK.get(x, 99))
         else:
-            services_dict[site] = sorted(detected, key=lambda x: order.index(x) if x in order else 99)
-
-    return {
-        "sites": dict(site_counter.most_common()),
-        "services": services_dict,
-        "auth_detected": {site: list(cookies) for site, cookies in auth_detected.items()},
-        "total_cleaned": len(cleaned_lines),
-        "total_unique_cookies": total_unique_cookies,
-        "unique_sites": unique_sites,
-        "most_common_site": most_common_site,
-        "oldest_cookie_age": oldest_cookie_age,
-        "tracking_intensity": tracking_intensity,
-        "privacy_score": privacy_score
-    }
+            services_dict[site] = sorted(detected, key=lambda x: _SERVICE_ORDER_RANK.get(x, 99))
+        # Report-ready form; empty names are already filtered out above
+        services_joined[site] = ", ".join(services_dict[site])
+
+    return CleanStats(
+        sites=dict(site_counter.most_common()),
+        services=services_dict,
+        services_joined=services_joined,
+        # Sets are passed through as-is; dict() only drops the defaultdict factory
+        auth_detected=dict(auth_detected),
+        total_cleaned=cleaned_count,
+        total_unique_cookies=total_unique_cookies,
+        unique_sites=unique_sites,
+        most_common_site=most_common_site,
+        oldest_timestamp=scan["oldest_timestamp"],
+        tracking_intensity=tracking_intensity,
+        privacy_score=privacy_score
+    )
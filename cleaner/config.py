@@ -1,5 +1,6 @@
 import json
 import os
+import re
 from functools import lru_cache
 
 @lru_cache(maxsize=1)
@@ -13,3 +14,29 @@ config = load_config()
 SITES = config["sites"]
 SCORING_RULES = config["scoring_rules"]
 CATEGORIES = config["categories"]
+
+# Lowercased auth names paired with their display spelling
+AUTH_LC = {
+    site: [(auth.lower(), auth) for auth in meta["auth"]]
+    for site, meta in SITES.items()
+}
+
+# Per site: one regex over all service keys, plus the key -> service it belongs to
+SERVICE_RE = {}
+KEY_TO_SERVICE = {}
+for _site, _meta in SITES.items():
+    _key_to_service = {}
+    for _service, _keys in _meta["services"].items():
+        for _key in _keys:
+            _key_to_service.setdefault(_key.lower(), _service)
+    KEY_TO_SERVICE[_site] = _key_to_service
+    SERVICE_RE[_site] = re.compile("|".join(map(re.escape, _key_to_service))) if _key_to_service else None
+
+# Site -> category; a site listed under several categories keeps the first one
+SITE_TO_CATEGORY = {}
+for _category, _sites in CATEGORIES.items():
+    for _site in _sites:
+        SITE_TO_CATEGORY.setdefault(_site, _category)
+
+# Score levels from the highest threshold down
+LEVELS_DESC = sorted(SCORING_RULES["levels"].items(), key=lambda item: -item[1]["min_score"])
@@ -1,21 +1,140 @@
+import asyncio
+import hashlib
+import io
 import logging
+import multiprocessing
 import os
-import tempfile
 import time
-from typing import Dict
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
 
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import FSInputFile, KeyboardButton, ReplyKeyboardMarkup, Message
-
-from .metrics import messages_processed, commands_processed, errors_total, processing_time, files_processed
-from .cleaner import clean_cookies, get_sites_by_category
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import (
+    BufferedInputFile,
+    Chat,
+    KeyboardButton,
+    Message,
+    MessageOriginChannel,
+    MessageOriginChat,
+    MessageOriginUser,
+    ReplyKeyboardMarkup,
+)
+
+from .metrics import messages_processed, start_commands, file_processing_errors, processing_time, files_processed
+from .cleaner import CleanStats, calculate_score, clean_cookies_stream, get_sites_by_category
 
 logger = logging.getLogger(__name__)
 
 router = Router()
 
+# Buttons that appear on several keyboards share one instance
+BTN_CANCEL = KeyboardButton(text="❌ Cancel")
+BTN_BACK = KeyboardButton(text="🔙 Back")
+BTN_MAIN_MENU = KeyboardButton(text="🏠 Main Menu")
+
+# Keyboards are built once and shared by every handler
+MAIN_MENU_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="🍪 Cookie Cleaner")],
+        [KeyboardButton(text="🆔 ID")]
+    ],
+    resize_keyboard=True
+)
+CANCEL_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [BTN_CANCEL]
+    ],
+    resize_keyboard=True
+)
+UPLOAD_ANOTHER_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="🔄 Upload Another"), BTN_CANCEL]
+    ],
+    resize_keyboard=True
+)
+ID_MENU_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="👤 Get my ID"), KeyboardButton(text="🔍 Get ID")],
+        [BTN_BACK]
+    ],
+    resize_keyboard=True
+)
+BACK_HOME_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [BTN_BACK, BTN_MAIN_MENU]
+    ],
+    resize_keyboard=True
+)
+GET_ANOTHER_KB = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="🔍 Get Another ID")],
+        [BTN_MAIN_MENU]
+    ],
+    resize_keyboard=True
+)
+
+
+# Statistics section of the report, filled from a CleanStats
+STATS_TEMPLATE = """
+=== STATISTICS ===
+Total unique cookies: {s.total_unique_cookies}
+Unique main domains: {s.unique_sites}
+Most common domain: {s.most_common_site}
+Oldest cookies age: {s.oldest_cookie_age}
+Tracking cookies detected: {s.tracking_intensity}
+🏆 Privacy Score: {s.privacy_score}/10.0
+"""
+
+# Workers for cookie parsing. Python 3.9 starts them all on the first upload, so keep the
+# count small; cpu_count() reports host cores inside containers, affinity reports ours.
+CLEAN_WORKERS = min(4, len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1)
+
+
+def new_clean_pool() -> ProcessPoolExecutor:
+    """Create the cookie parsing pool."""
+    # forkserver workers are started from a fresh interpreter instead of forking the threaded
+    # bot process. They still import the bot's main module as __mp_main__ (without running
+    # main()), but only clean_cookies_stream runs there.
+    return ProcessPoolExecutor(max_workers=CLEAN_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+
+
+# Created on dispatcher startup and shut down with it, so importing this module starts nothing
+CLEAN_POOL: Optional[ProcessPoolExecutor] = None
+
+
+@router.startup()
+async def start_clean_pool() -> None:
+    global CLEAN_POOL
+    CLEAN_POOL = new_clean_pool()
+
+
+@router.shutdown()
+async def stop_clean_pool() -> None:
+    global CLEAN_POOL
+    if CLEAN_POOL is not None:
+        CLEAN_POOL.shutdown()
+        CLEAN_POOL = None
+
+
+# Strong references to fire-and-forget tasks so they aren't collected mid-flight
+BACKGROUND_TASKS: Set[asyncio.Task] = set()
+
+# Stats of recent uploads keyed by BLAKE2b of the file; users often re-send the same export
+STATS_CACHE_SIZE = 128
+STATS_CACHE: "OrderedDict[bytes, CleanStats]" = OrderedDict()
+
+
+# Message ids mirrored from FSM data per storage key, so reads skip a storage round-trip;
+# least recently used chats are dropped so one-off users don't accumulate
+MESSAGE_ID_CACHE_SIZE = 1024
+MESSAGE_ID_CACHE: "OrderedDict[StorageKey, Dict[str, int]]" = OrderedDict()
+
+
 class CookieStates(StatesGroup):
     waiting_for_file = State()
 
@@ -25,34 +144,114 @@ class MenuStates(StatesGroup):
     get_id_waiting = State()
 
 
-@router.message(F.text == "/start")
+def cache_message_id(state: FSMContext, key: str, value: int) -> None:
+    """Remember a message id for the chat, evicting the least recently used chat when full."""
+    MESSAGE_ID_CACHE.setdefault(state.key, {})[key] = value
+    MESSAGE_ID_CACHE.move_to_end(state.key)
+    if len(MESSAGE_ID_CACHE) > MESSAGE_ID_CACHE_SIZE:
+        MESSAGE_ID_CACHE.popitem(last=False)
+
+
+async def get_message_id(state: FSMContext, key: str) -> Optional[int]:
+    """Read a message id from the cache, falling back to FSM data."""
+    cached = MESSAGE_ID_CACHE.get(state.key)
+    if cached is not None and key in cached:
+        MESSAGE_ID_CACHE.move_to_end(state.key)
+        return cached[key]
+
+    value = (await state.get_data()).get(key)
+    if value is not None:
+        cache_message_id(state, key, value)
+    return value
+
+
+async def set_message_id(state: FSMContext, key: str, value: int) -> None:
+    """Store a message id in FSM data and the cache."""
+    await state.update_data({key: value})
+    cache_message_id(state, key, value)
+
+
+async def clear_state(state: FSMContext) -> None:
+    """Clear FSM state and data along with the cached message ids."""
+    await state.clear()
+    MESSAGE_ID_CACHE.pop(state.key, None)
+
+
 async def start(message: Message, state: FSMContext) -> None:
     messages_processed.inc()
-    commands_processed.labels(command="/start").inc()
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🍪 Cookie Cleaner")],
-            [KeyboardButton(text="🆔 ID")]
-        ],
-        resize_keyboard=True
-    )
-    main_msg = await message.answer("Welcome! Choose an action:", reply_markup=keyboard)
+    start_commands.inc()
+    main_msg = await message.answer("Welcome! Choose an action:", reply_markup=MAIN_MENU_KB)
+    # Never read back, so it goes to FSM data only
     await state.update_data(main_message_id=main_msg.message_id)
     await state.set_state(MenuStates.main_menu)
 
-@router.message(F.text == "🍪 Cookie Cleaner")
 async def cookie_cleaner_message(message: Message, state: FSMContext) -> None:
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="❌ Cancel")]
-        ],
-        resize_keyboard=True
-    )
-    status_msg = await message.answer("📤 Upload your cookies file (Edge format):", reply_markup=keyboard)
-    await state.update_data(message_id=status_msg.message_id)
+    status_msg = await message.answer("📤 Upload your cookies file (Edge format):", reply_markup=CANCEL_KB)
+    await set_message_id(state, 'message_id', status_msg.message_id)
     await state.set_state(CookieStates.waiting_for_file)
 
 
+async def analyze_upload(data: bytes) -> CleanStats:
+    """Return stats for an uploaded file, reusing the result of an identical earlier upload."""
+    key = hashlib.blake2b(data, digest_size=32).digest()
+    stats = STATS_CACHE.get(key)
+    if stats is not None:
+        STATS_CACHE.move_to_end(key)
+        return stats
+
+    # Parsing is CPU-bound pure Python; a process pool keeps it off the loop and the GIL
+    global CLEAN_POOL
+    loop = asyncio.get_running_loop()
+    pool = CLEAN_POOL
+    try:
+        stats = await loop.run_in_executor(pool, clean_cookies_stream, data)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed on a huge dump); replace the pool once and retry
+        if CLEAN_POOL is pool:
+            logger.warning("Cookie parsing pool broke, restarting it")
+            pool.shutdown(wait=False)
+            CLEAN_POOL = new_clean_pool()
+        stats = await loop.run_in_executor(CLEAN_POOL, clean_cookies_stream, data)
+    STATS_CACHE[key] = stats
+    if len(STATS_CACHE) > STATS_CACHE_SIZE:
+        STATS_CACHE.popitem(last=False)
+    return stats
+
+
+async def set_status(message: Message, state: FSMContext, status_message_id: int, text: str) -> int:
+    """Edit the status message, or send a new one if it can't be edited. Returns the status message id."""
+    try:
+        await message.bot.edit_message_text(
+            chat_id=message.chat.id,
+            message_id=status_message_id,
+            text=text
+        )
+    except Exception:
+        status_msg = await message.answer(text)
+        await set_message_id(state, 'message_id', status_msg.message_id)
+        return status_msg.message_id
+    return status_message_id
+
+
+async def finish_status(message: Message, status_message_id: int, text: str) -> None:
+    """Edit the status message one last time; failures are ignored since the report carries the result."""
+    try:
+        await message.bot.edit_message_text(
+            chat_id=message.chat.id,
+            message_id=status_message_id,
+            text=text
+        )
+    except Exception:
+        pass
+
+
+def run_in_background(coro: Awaitable) -> None:
+    """Schedule a coroutine without waiting for it."""
+    task = asyncio.ensure_future(coro)
+    BACKGROUND_TASKS.add(task)
+    task.add_done_callback(BACKGROUND_TASKS.discard)
+
+
 @router.message(F.document)
 async def file_handler(message: Message, state: FSMContext) -> None:
     messages_processed.inc()
@@ -65,369 +264,203 @@ async def file_handler(message: Message, state: FSMContext) -> None:
         await message.answer("Please upload only one txt file at a time.")
         return
 
-    data = await state.get_data()
-    status_message_id = data.get('message_id')
+    status_message_id = await get_message_id(state, 'message_id')
 
     if not status_message_id:
         await message.answer("Session error. Please start over.")
-        await state.clear()
+        await clear_state(state)
         return
 
-    temp_input = None
-    temp_output = None
-    stats_file = None
-
     start_time = time.time()
     try:
-        try:
-            await message.bot.edit_message_text(
-                chat_id=message.chat.id,
-                message_id=status_message_id,
-                text="⏳ Processing your cookie file..."
-            )
-        except Exception:
-            status_msg = await message.answer("⏳ Processing your cookie file...")
-            await state.update_data(message_id=status_msg.message_id)
-            status_message_id = status_msg.message_id
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as temp_file:
-            temp_input = temp_file.name
-            await message.bot.download(document, temp_input)
-
-        try:
-            await message.bot.edit_message_text(
-                chat_id=message.chat.id,
-                message_id=status_message_id,
-                text="🧹 Cleaning cookies..."
-            )
-        except Exception:
-            status_msg = await message.answer("🧹 Cleaning cookies...")
-            await state.update_data(message_id=status_msg.message_id)
-            status_message_id = status_msg.message_id
+        # The whole pipeline runs in memory; nothing touches the disk
+        buffer = io.BytesIO()
+
+        # Only the first and last status updates are sent; each edit is a Telegram round-trip.
+        # The status edit doesn't depend on the download, so both go out together.
+        status_message_id, _ = await asyncio.gather(
+            set_status(message, state, status_message_id, "⏳ Processing your cookie file..."),
+            message.bot.download(document, destination=buffer),
+        )
 
-        temp_output = temp_input + "_cleaned.txt"
-        stats: Dict = clean_cookies(temp_input, temp_output)
+        stats = await analyze_upload(buffer.getvalue())
 
-        try:
-            await message.bot.edit_message_text(
-                chat_id=message.chat.id,
-                message_id=status_message_id,
-                text="📊 Generating statistics..."
-            )
-        except Exception:
-            status_msg = await message.answer("📊 Generating statistics...")
-            await state.update_data(message_id=status_msg.message_id)
-            status_message_id = status_msg.message_id
-
-        stats_file = temp_input + "_stats.txt"
-        with open(stats_file, "w", encoding="utf-8") as f:
-            from .cleaner import calculate_score
-            site_counter = {site: count for site, count in stats["sites"].items()}
-            service_counter = {site: {svc: 1 for svc in svcs} for site, svcs in stats["services"].items()}
-            auth_detected = {site: set(cookies) for site, cookies in stats["auth_detected"].items()}
-            score, level, _ = calculate_score(site_counter, service_counter, auth_detected)
-            categories = get_sites_by_category(site_counter)
-            f.write(f"🧠 SCORE: {score} ({level})\n\n")
-
-            for site, count in stats["sites"].items():
-                site_name = site
-                services = ", ".join([s for s in stats["services"].get(site, []) if s])
-                if services:
-                    f.write(f"{site_name}({count}) - {services}\n")
-                else:
-                    f.write(f"{site_name}({count})\n")
-
-            if stats["auth_detected"]:
-                f.write("\n🔐 AUTH DETECTED:\n")
-                for site, cookies in stats["auth_detected"].items():
-                    site_name = site
-                    f.write(f"{site_name}: {', '.join(cookies)}\n")
-
-            f.write(f"\n=== STATISTICS ===\n")
-            f.write(f"Total unique cookies: {stats['total_unique_cookies']}\n")
-            f.write(f"Unique main domains: {stats['unique_sites']}\n")
-            f.write(f"Most common domain: {stats['most_common_site']}\n")
-            f.write(f"Oldest cookies age: {stats.get('oldest_cookie_age', 'Unknown')}\n")
-            f.write(f"Tracking cookies detected: {stats.get('tracking_intensity', 0)}\n")
-            f.write(f"🏆 Privacy Score: {stats.get('privacy_score', 0.0)}/10.0\n")
-
-            if categories:
-                f.write("\n=== BY CATEGORIES ===\n")
-                for category, sites in categories.items():
-                    if sites:
-                        f.write(f"{category.capitalize()}: {', '.join(sites)}\n")
+        if not stats.sites:
+            # Nothing to report, so skip building and uploading an empty one
+            await message.answer("No cookies found in file.\n\nUpload another file or cancel:", reply_markup=UPLOAD_ANOTHER_KB)
+            run_in_background(finish_status(message, status_message_id, "✅ Processing complete!"))
+            processing_time.observe(time.time() - start_time)
+            files_processed.inc()
+            return
 
-        try:
-            await message.bot.edit_message_text(
-                chat_id=message.chat.id,
-                message_id=status_message_id,
-                text="✅ Processing complete! Sending results..."
-            )
-        except Exception:
-            await message.answer("✅ Processing complete! Sending results...")
+        # The scorer only needs membership tests, so the stats are passed as-is
+        score, level, _ = calculate_score(stats.sites, stats.services, stats.auth_detected)
+        categories = get_sites_by_category(stats.sites)
 
         # Get original filename without extension
         original_name = os.path.splitext(document.file_name)[0]
         cleaned_filename = f"cleaned_{original_name}.txt"
 
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="🔄 Upload Another"), KeyboardButton(text="❌ Cancel")]
-            ],
-            resize_keyboard=True
-        )
-
-        # Create the full formatted report content
-        report_content = f"""🧠 SCORE: {score} ({level})
-
-"""
+        # Collect the report pieces and join them once at the end
+        report_parts = [f"🧠 SCORE: {score} ({level})\n\n"]
+        append = report_parts.append
 
-        # Add site information
-        for site, count in stats["sites"].items():
-            site_name = site
-            services = ", ".join([s for s in stats["services"].get(site, []) if s])
-            if services:
-                report_content += f"{site_name}({count}) - {services}\n"
-            else:
-                report_content += f"{site_name}({count})\n"
+        # Add site information; services come pre-joined with the stats
+        services_joined = stats.services_joined
+        append("".join([
+            f"{site}({count}) - {services_joined[site]}\n" if services_joined.get(site) else f"{site}({count})\n"
+            for site, count in stats.sites.items()
+        ]))
 
         # Add auth detected section
-        if stats["auth_detected"]:
-            report_content += "\n🔐 AUTH DETECTED:\n"
-            for site, cookies in stats["auth_detected"].items():
-                site_name = site
-                report_content += f"{site_name}: {', '.join(cookies)}\n"
+        if stats.auth_detected:
+            append("\n🔐 AUTH DETECTED:\n")
+            for site, cookies in stats.auth_detected.items():
+                append(f"{site}: {', '.join(cookies)}\n")
 
         # Add statistics section
-        report_content += f"""
-=== STATISTICS ===
-Total unique cookies: {stats['total_unique_cookies']}
-Unique main domains: {stats['unique_sites']}
-Most common domain: {stats['most_common_site']}
-Oldest cookies age: {stats.get('oldest_cookie_age', 'Unknown')}
-Tracking cookies detected: {stats.get('tracking_intensity', 0)}
-🏆 Privacy Score: {stats.get('privacy_score', 0.0)}/10.0
-"""
+        append(STATS_TEMPLATE.format(s=stats))
 
         # Add categories section
         if categories:
-            report_content += "\n=== BY CATEGORIES ===\n"
+            append("\n=== BY CATEGORIES ===\n")
             for category, sites in categories.items():
                 if sites:
-                    report_content += f"{category.capitalize()}: {', '.join(sites)}\n"
+                    append(f"{category.capitalize()}: {', '.join(sites)}\n")
 
-        # Write the report to the cleaned file
-        with open(temp_output, "w", encoding="utf-8") as f:
-            f.write(report_content)
+        report_content = "".join(report_parts)
 
-        # Send the report file
+        # Send the report straight from memory
         await message.answer_document(
-            FSInputFile(temp_output, filename=cleaned_filename),
-            caption=f"Cleaned cookies report. Total kept: {stats['total_cleaned']}\n\nChoose an action:",
-            reply_markup=keyboard
+            BufferedInputFile(report_content.encode("utf-8"), filename=cleaned_filename),
+            caption=f"Cleaned cookies report. Total kept: {stats.total_cleaned}\n\nChoose an action:",
+            reply_markup=UPLOAD_ANOTHER_KB
         )
 
-        # Final status update without sending another message since keyboard is already sent with stats
-        try:
-            await message.bot.edit_message_text(
-                chat_id=message.chat.id,
-                message_id=status_message_id,
-                text="✅ Processing complete!"
-            )
-        except Exception:
-            pass  # Status message already updated
+        # Only report completion once the report is out; the edit is cosmetic, so don't wait on it
+        run_in_background(finish_status(message, status_message_id, "✅ Processing complete!"))
 
         processing_time.observe(time.time() - start_time)
         files_processed.inc()
         logger.info(f"Processed cookies for user {message.from_user.id}")
 
     except Exception as e:
-        errors_total.labels(type="file_processing").inc()
+        file_processing_errors.inc()
         logger.error(f"Error processing file: {e}")
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="🔄 Upload Another"), KeyboardButton(text="❌ Cancel")]
-            ],
-            resize_keyboard=True
-        )
         try:
             await message.bot.edit_message_text(
                 chat_id=message.chat.id,
                 message_id=status_message_id,
                 text=f"❌ Error: {str(e)}\n\nUpload another file or cancel:",
-                reply_markup=keyboard
+                reply_markup=UPLOAD_ANOTHER_KB
             )
         except Exception:
-            await message.answer(f"Error processing file: {str(e)}\n\nChoose an action:", reply_markup=keyboard)
-            await state.clear()
-    finally:
-        for file_path in [temp_input, temp_output, stats_file]:
-            if file_path and os.path.exists(file_path):
-                os.unlink(file_path)
+            await message.answer(f"Error processing file: {str(e)}\n\nChoose an action:", reply_markup=UPLOAD_ANOTHER_KB)
+            await clear_state(state)
 
 
 
 
 
-@router.message(F.text == "🆔 ID")
 async def id_menu_message(message: Message, state: FSMContext) -> None:
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="👤 Get my ID"), KeyboardButton(text="🔍 Get ID")],
-            [KeyboardButton(text="🔙 Back")]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer("🆔 ID Tools:", reply_markup=keyboard)
+    await message.answer("🆔 ID Tools:", reply_markup=ID_MENU_KB)
     await state.set_state(MenuStates.id_menu)
     await state.update_data(last_menu_type='id')
 
-@router.message(F.text == "👤 Get my ID", MenuStates.id_menu)
 async def get_my_id_message(message: Message, state: FSMContext) -> None:
     user_id = message.from_user.id
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🔙 Back"), KeyboardButton(text="🏠 Main Menu")]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer(f"👤 Your ID: `{user_id}`", parse_mode="Markdown", reply_markup=keyboard)
+    await message.answer(f"👤 Your ID: `{user_id}`", parse_mode="Markdown", reply_markup=BACK_HOME_KB)
 
-@router.message(F.text == "🔍 Get ID")
 async def get_id_message(message: Message, state: FSMContext) -> None:
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🔙 Back"), KeyboardButton(text="🏠 Main Menu")]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer("🔍 Forward a message to get the sender's ID:", reply_markup=keyboard)
-    await state.set_state(MenuStates.get_id_waiting)
-
-@router.message(F.text == "🔍 Get Another ID")
-async def get_another_id_message(message: Message, state: FSMContext) -> None:
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🔙 Back"), KeyboardButton(text="🏠 Main Menu")]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer("🔍 Forward a message to get the sender's ID:", reply_markup=keyboard)
+    await message.answer("🔍 Forward a message to get the sender's ID:", reply_markup=BACK_HOME_KB)
     await state.set_state(MenuStates.get_id_waiting)
 
-@router.message(F.text == "🏠 Main Menu")
 async def back_to_main_message(message: Message, state: FSMContext) -> None:
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🍪 Cookie Cleaner")],
-            [KeyboardButton(text="🆔 ID")]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer("Welcome! Choose an action:", reply_markup=keyboard)
+    await message.answer("Welcome! Choose an action:", reply_markup=MAIN_MENU_KB)
     await state.set_state(MenuStates.main_menu)
 
-@router.message(F.text == "🔙 Back")
 async def back_button_handler(message: Message, state: FSMContext) -> None:
     current_state = await state.get_state()
     data = await state.get_data()
     last_menu_type = data.get('last_menu_type', 'main')
 
     if current_state and str(current_state).endswith('id_menu') or last_menu_type == 'id':
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="🍪 Cookie Cleaner")],
-                [KeyboardButton(text="🆔 ID")]
-            ],
-            resize_keyboard=True
-        )
-        await message.answer("Welcome! Choose an action:", reply_markup=keyboard)
+        await message.answer("Welcome! Choose an action:", reply_markup=MAIN_MENU_KB)
         await state.set_state(MenuStates.main_menu)
         await state.update_data(last_menu_type='main')
     else:
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="👤 Get my ID"), KeyboardButton(text="🔍 Get ID")],
-                [KeyboardButton(text="🔙 Back")]
-            ],
-            resize_keyboard=True
-        )
-        await message.answer("🆔 ID Tools:", reply_markup=keyboard)
+        await message.answer("🆔 ID Tools:", reply_markup=ID_MENU_KB)
         await state.set_state(MenuStates.id_menu)
         await state.update_data(last_menu_type='id')
 
-@router.message(F.forward_origin, MenuStates.get_id_waiting)
-async def handle_forwarded_message(message: Message, state: FSMContext) -> None:
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🔍 Get Another ID")],
-            [KeyboardButton(text="🏠 Main Menu")]
-        ],
-        resize_keyboard=True
+async def reply_with_chat_id(message: Message, chat: Chat) -> None:
+    """Reply with the id and title of the chat a message was forwarded from."""
+    chat_title = getattr(chat, 'title', 'Unknown chat')
+    await message.reply(
+        f"🔍 **Chat ID:** `{chat.id}`\n**Chat:** {chat_title}",
+        parse_mode="Markdown",
+        reply_markup=GET_ANOTHER_KB
     )
 
-    if message.forward_origin:
-        if hasattr(message.forward_origin, 'sender_user') and message.forward_origin.sender_user:
-            original_user = message.forward_origin.sender_user
-            user_id = original_user.id
-            username = original_user.username or "No username"
-
-            await message.reply(
-                f"🔍 **Sender ID:** `{user_id}`\n**Username:** @{username}",
-                parse_mode="Markdown",
-                reply_markup=keyboard
-            )
-
-        elif hasattr(message.forward_origin, 'chat') and message.forward_origin.chat:
-            chat = message.forward_origin.chat
-            chat_id = chat.id
-            chat_title = getattr(chat, 'title', 'Unknown chat')
+@router.message(F.forward_origin, MenuStates.get_id_waiting)
+async def handle_forwarded_message(message: Message, state: FSMContext) -> None:
+    # The F.forward_origin filter guarantees forward_origin is set
+    forward_origin = message.forward_origin
+
+    if isinstance(forward_origin, MessageOriginUser):
+        original_user = forward_origin.sender_user
+        user_id = original_user.id
+        username = original_user.username or "No username"
+
+        await message.reply(
+            f"🔍 **Sender ID:** `{user_id}`\n**Username:** @{username}",
+            parse_mode="Markdown",
+            reply_markup=GET_ANOTHER_KB
+        )
 
-            await message.reply(
-                f"🔍 **Chat ID:** `{chat_id}`\n**Chat:** {chat_title}",
-                parse_mode="Markdown",
-                reply_markup=keyboard
-            )
+    elif isinstance(forward_origin, MessageOriginChannel):
+        await reply_with_chat_id(message, forward_origin.chat)
 
-        else:
-            await message.reply("❌ Unable to extract ID from this message.", reply_markup=keyboard)
+    elif isinstance(forward_origin, MessageOriginChat):
+        # Posts by anonymous group admins carry the group as sender_chat
+        await reply_with_chat_id(message, forward_origin.sender_chat)
 
     else:
-        if message.forward_origin:
-            if hasattr(message.forward_origin, 'sender_user') and message.forward_origin.sender_user:
-                original_user = message.forward_origin.sender_user
-                user_id = original_user.id
-                username = original_user.username or "No username"
-                await message.answer(f"Original sender ID: `{user_id}`\nUsername: @{username}", parse_mode="Markdown")
-            elif hasattr(message.forward_origin, 'chat') and message.forward_origin.chat:
-                chat = message.forward_origin.chat
-                chat_id = chat.id
-                chat_title = getattr(chat, 'title', 'Unknown chat')
-                await message.answer(f"Original chat ID: `{chat_id}`\nChat: {chat_title}", parse_mode="Markdown")
-            else:
-                await message.answer("Unable to extract ID from this forwarded message.")
-
-@router.message(F.text == "🔄 Upload Another")
-async def upload_another_message(message: Message, state: FSMContext) -> None:
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="❌ Cancel")]
-        ],
-        resize_keyboard=True
-    )
-    status_msg = await message.answer("📤 Upload your cookies file (Edge format):", reply_markup=keyboard)
-    await state.update_data(message_id=status_msg.message_id)
-    await state.set_state(CookieStates.waiting_for_file)
+        await message.reply("❌ Unable to extract ID from this message.", reply_markup=GET_ANOTHER_KB)
 
-@router.message(F.text == "❌ Cancel")
 async def cancel_message(message: Message, state: FSMContext) -> None:
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="🍪 Cookie Cleaner")],
-            [KeyboardButton(text="🆔 ID")]
-        ],
-        resize_keyboard=True
-    )
-    await message.answer("Action cancelled.", reply_markup=keyboard)
-    await state.clear()
+    await message.answer("Action cancelled.", reply_markup=MAIN_MENU_KB)
+    await clear_state(state)
     await state.set_state(MenuStates.main_menu)
+
+
+# Menu buttons are exact texts: one filter and a dict lookup instead of a filter per handler
+TEXT_HANDLERS: Dict[str, Callable[[Message, FSMContext], Awaitable[None]]] = {
+    "/start": start,
+    "🍪 Cookie Cleaner": cookie_cleaner_message,
+    "🔄 Upload Another": cookie_cleaner_message,
+    "🆔 ID": id_menu_message,
+    "🔍 Get ID": get_id_message,
+    "🔍 Get Another ID": get_id_message,
+    "🏠 Main Menu": back_to_main_message,
+    "🔙 Back": back_button_handler,
+    "❌ Cancel": cancel_message,
+}
+
+
+# Buttons that only act in one state, keyed on (text, state name)
+STATE_TEXT_HANDLERS: Dict[Tuple[str, str], Callable[[Message, FSMContext], Awaitable[None]]] = {
+    ("👤 Get my ID", MenuStates.id_menu.state): get_my_id_message,
+}
+STATE_TEXTS = frozenset(text for text, _ in STATE_TEXT_HANDLERS)
+
+
+@router.message(F.text.in_(TEXT_HANDLERS.keys() | STATE_TEXTS))
+async def text_dispatcher(message: Message, state: FSMContext) -> None:
+    handler = TEXT_HANDLERS.get(message.text)
+    if handler is None:
+        # Only state-scoped texts reach here, so the state lookup is paid just for them
+        handler = STATE_TEXT_HANDLERS.get((message.text, await state.get_state()))
+        if handler is None:
+            return
+    await handler(message, state)
@@ -1,9 +1,37 @@
 from prometheus_client import CollectorRegistry, Counter, Histogram
 
+
+class BatchedCounter:
+    """Counter front that accumulates increments on the event loop and applies them on flush."""
+
+    def __init__(self, counter: Counter) -> None:
+        self._counter = counter
+        self._pending = 0
+
+    def inc(self, amount: int = 1) -> None:
+        # Handlers all run on the event loop thread, so a plain int needs no lock
+        self._pending += amount
+
+    def flush(self) -> None:
+        if self._pending:
+            self._counter.inc(self._pending)
+            self._pending = 0
+
+
 # Prometheus metrics
 registry = CollectorRegistry()
-messages_processed = Counter('telegram_messages_processed_total', 'Total messages processed', registry=registry)
+messages_processed = BatchedCounter(Counter('telegram_messages_processed_total', 'Total messages processed', registry=registry))
 commands_processed = Counter('telegram_commands_processed_total', 'Total commands processed', ['command'], registry=registry)
 errors_total = Counter('telegram_errors_total', 'Total errors', ['type'], registry=registry)
 processing_time = Histogram('telegram_message_processing_duration_seconds', 'Message processing time', registry=registry)
-files_processed = Counter('telegram_files_processed_total', 'Total files processed', registry=registry)
+files_processed = BatchedCounter(Counter('telegram_files_processed_total', 'Total files processed', registry=registry))
+
+# Labeled children bound once, so hot paths skip the .labels() lookup
+start_commands = commands_processed.labels(command='/start')
+file_processing_errors = errors_total.labels(type='file_processing')
+
+
+def flush_metrics() -> None:
+    """Apply pending batched increments; call on the event loop before exporting."""
+    messages_processed.flush()
+    files_processed.flush()
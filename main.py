@@ -2,10 +2,70 @@
 CLI script for cookie analysis.
 """
 
+import hashlib
+import os
+import pickle
 import sys
-from collections import defaultdict, Counter
 
-from cleaner import parse_cookies, calculate_score
+from cleaner.cleaner import parse_cookies, calculate_score
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "telegram-cleaner")
+# Bump when the pickled result layout changes
+CACHE_VERSION = 1
+# Parse results kept on disk; the least recently used are removed beyond this
+CACHE_MAX_ENTRIES = 32
+# Parsing depends on these as much as on the input file
+CACHE_DEPENDENCIES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cleaner", name)
+    for name in ("config.json", "config.py", "cleaner.py")
+]
+
+
+def cache_key(file_path):
+    """Digest of the input file, the parser's config and code, and the cache version."""
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for path in [file_path] + CACHE_DEPENDENCIES:
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def prune_cache():
+    """Remove the least recently used cached results beyond CACHE_MAX_ENTRIES."""
+    entries = [
+        os.path.join(CACHE_DIR, name)
+        for name in os.listdir(CACHE_DIR)
+        if name.startswith("parse-") and name.endswith(".pkl")
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[CACHE_MAX_ENTRIES:]:
+        os.remove(path)
+
+
+def load_parse_result(file_path):
+    """Parse a cookies file, reusing a cached result for identical file contents."""
+    cache_path = os.path.join(CACHE_DIR, f"parse-{cache_key(file_path)}.pkl")
+
+    try:
+        with open(cache_path, "rb") as f:
+            result = pickle.load(f)
+        # Refresh the mtime so pruning sees this entry as recently used
+        os.utime(cache_path)
+        return result
+    except Exception:
+        # Missing, truncated or incompatible cache entries just mean a fresh parse
+        pass
+
+    result = parse_cookies(file_path)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache_path, "wb") as f:
+            pickle.dump(result, f)
+        prune_cache()
+    except OSError:
+        # The cache is only an optimization
+        pass
+    return result
 
 
 def main():
@@ -16,14 +76,15 @@ def main():
     file_path = sys.argv[1]
 
     try:
-        site_counter, service_counter, auth_detected = parse_cookies(file_path)
+        site_counter, service_counter, auth_detected = load_parse_result(file_path)
         score, level, score_reasons = calculate_score(site_counter, service_counter, auth_detected)
 
         # Output
         print("📊 UNIQUE COOKIES BY SITES:\n")
-        for site, total in site_counter.most_common():
-            services = ", ".join(service_counter[site].keys())
-            print(f"{site}({total}) - {services}")
+        print("\n".join(
+            f"{site}({total}) - {', '.join(service_counter[site])}"
+            for site, total in site_counter.most_common()
+        ))
 
         print("\n🔐 AUTH DETECTED:")
         if not auth_detected: